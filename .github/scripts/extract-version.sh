@@ -7,7 +7,14 @@ echo "📋 Extracting version information..."
 # Function to extract version from server/version.py
 get_version_from_file() {
     if [ -f "server/version.py" ]; then
-        grep -o '__version__ = "[^"]*"' server/version.py | cut -d'"' -f2
+        # Pure bash: no external processes, and stop at the first match
+        local line pattern='__version__ = "([^"]*)"'
+        while IFS= read -r line || [ -n "$line" ]; do
+            if [[ $line =~ $pattern ]]; then
+                echo "${BASH_REMATCH[1]}"
+                return
+            fi
+        done < server/version.py
     else
         echo ""
     fi
@@ -21,7 +21,14 @@ echo "Current branch: $CURRENT_BRANCH"
 # Function to get current version from server/version.py
 get_current_version() {
     if [ -f "server/version.py" ]; then
-        grep -o '__version__ = "[^"]*"' server/version.py | head -1 | cut -d'"' -f2 | tr -d '\n\r' | xargs
+        # Pure bash: no external processes, and stop at the first match
+        local line pattern='__version__ = "([^"]*)"'
+        while IFS= read -r line || [ -n "$line" ]; do
+            if [[ $line =~ $pattern ]]; then
+                echo "${BASH_REMATCH[1]}"
+                return
+            fi
+        done < server/version.py
     else
         echo "❌ Error: server/version.py not found"
         exit 1
@@ -69,9 +76,13 @@ update_version_in_file() {
     if [ -f "$file" ]; then
         echo "📝 Updating version in $file: $old_version -> $new_version"
         
-        # Clean versions of any whitespace
-        old_version=$(echo "$old_version" | tr -d '\n\r' | xargs)
-        new_version=$(echo "$new_version" | tr -d '\n\r' | xargs)
+        # Clean versions of any whitespace (parameter expansion, no subprocesses)
+        old_version="${old_version//[$'\n\r']/}"
+        old_version="${old_version#"${old_version%%[![:space:]]*}"}"
+        old_version="${old_version%"${old_version##*[![:space:]]}"}"
+        new_version="${new_version//[$'\n\r']/}"
+        new_version="${new_version#"${new_version%%[![:space:]]*}"}"
+        new_version="${new_version%"${new_version##*[![:space:]]}"}"
         
         # Escape special characters for sed (dots become literal dots)
         local escaped_old_version=$(echo "$old_version" | sed 's/\./\\./g')
@@ -39,12 +39,15 @@ def log_step(msg):
 def get_version():
     """Extract version from server/version.py"""
     try:
-        sys.path.insert(0, 'server')
-        from version import __version__
-        return __version__
-    except ImportError:
-        log_warning("Could not import version from server/version.py, using default")
-        return "1.0.0"
+        # Stream the file and stop at the assignment instead of importing it
+        with open(os.path.join('server', 'version.py'), encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('__version__ = "'):
+                    return line.split('"', 2)[1]
+    except OSError:
+        pass
+    log_warning("Could not read version from server/version.py, using default")
+    return "1.0.0"
 
 def extract_identity_from_cert(cert_file, cert_type):
     """Extract certificate identity from .cer file without importing to keychain"""
@@ -36,8 +36,20 @@ import os
 import subprocess
 import sys
 import importlib
+import importlib.util
+import mmap
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from nacl.public import SealedBox
+
+try:
+    import orjson as _json
+except ImportError:
+    _json = json
 
 
 class Colors:
@@ -52,49 +64,143 @@ class Colors:
     BOLD = "\033[1m"
 
 
+# Third-party modules, bound by import_dependencies() once they are available
+requests = None
+nacl_public = None
+
+# Concurrent secret uploads; well within GitHub's 5000 requests/hour limit
+MAX_PARALLEL_UPLOADS = 8
+
+# Importable module name -> pip package name for each runtime dependency
+DEPENDENCIES = {
+    "requests": "requests",
+    "nacl": "PyNaCl",
+}
+
+
+# Secret names grouped for the configuration summary
+SECRET_CATEGORIES = {
+    'macOS Signing (Required)': [
+        'APPLE_DEVELOPER_ID_APPLICATION_CERT',
+        'APPLE_DEVELOPER_ID_INSTALLER_CERT',
+        'APPLE_CERT_PASSWORD',
+        'APPLE_ID',
+        'APPLE_ID_PASSWORD',
+        'APPLE_TEAM_ID'
+    ],
+    'App Store Connect (Optional)': [
+        'APP_STORE_CONNECT_KEY_ID',
+        'APP_STORE_CONNECT_ISSUER_ID',
+        'APP_STORE_CONNECT_API_KEY'
+    ],
+    'Build Configuration': [
+        'ENABLE_APP_STORE_BUILD',
+        'ENABLE_APP_STORE_SUBMISSION',
+        'ENABLE_NOTARIZATION'
+    ],
+    'App Information': [
+        'APP_BUNDLE_ID_PREFIX',
+        'APP_AUTHOR_NAME',
+        'APP_AUTHOR_EMAIL'
+    ]
+}
+
+# Reverse lookup: secret name -> category
+_SECRET_TO_CATEGORY = {
+    name: category for category, names in SECRET_CATEGORIES.items() for name in names
+}
+
+
+def import_dependencies() -> List[str]:
+    """Import requests and PyNaCl once and bind them at module level.
+
+    Returns the pip package names of any modules that could not be imported.
+    """
+    global requests, nacl_public
+    missing = []
+    try:
+        requests = importlib.import_module("requests")
+    except ImportError:
+        missing.append("requests")
+    try:
+        nacl_public = importlib.import_module("nacl.public")
+    except ImportError:
+        missing.append("PyNaCl")
+    return missing
+
+
+def b64encode_file(path: Path) -> bytes:
+    """Base64-encode a file without reading it into an intermediate buffer.
+
+    The ASCII result is kept as bytes so it can be encrypted without a
+    further str round-trip.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return base64.b64encode(mm)
+
+
 class GitHubSecretsManager:
     """Complete GitHub secrets manager for R2MIDI."""
 
     def __init__(self, force_update: bool = False, test_only: bool = False):
         self.config = {}
-        self.secrets = {}
+        self.secrets: Dict[str, Union[str, bytes, None]] = {}
         self.force_update = force_update
         self.test_only = test_only
         self.project_root = Path(__file__).parent.parent
         self.config_file = self.project_root / "apple_credentials" / "config" / "app_config.json"
         self.github_api_base = "https://api.github.com"
         self.session = None
+        self._p12_base_path = None
+        self._buf: List[str] = []
         
+    def emit(self, text: str = ""):
+        """Queue a line of output; it is written on the next flush()."""
+        self._buf.append(f"{text}\n")
+
+    def flush(self):
+        """Write all queued output to stdout in a single call."""
+        if self._buf:
+            sys.stdout.write("".join(self._buf))
+            sys.stdout.flush()
+            self._buf.clear()
+
     def print_header(self, text: str):
         """Print a formatted header."""
-        print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*70}")
-        print(f"{text}")
-        print(f"{'='*70}{Colors.ENDC}")
+        self.emit(f"\n{Colors.HEADER}{Colors.BOLD}{'='*70}")
+        self.emit(f"{text}")
+        self.emit(f"{'='*70}{Colors.ENDC}")
+        self.flush()
 
     def print_step(self, step: int, title: str):
         """Print a step header."""
-        print(f"\n{Colors.CYAN}{Colors.BOLD}Step {step}: {title}{Colors.ENDC}")
+        self.emit(f"\n{Colors.CYAN}{Colors.BOLD}Step {step}: {title}{Colors.ENDC}")
         if self.force_update:
-            print(f"{Colors.CYAN}[FORCE MODE: Will update all secrets]{Colors.ENDC}")
+            self.emit(f"{Colors.CYAN}[FORCE MODE: Will update all secrets]{Colors.ENDC}")
         if self.test_only:
-            print(f"{Colors.BLUE}[TEST MODE: No changes will be made]{Colors.ENDC}")
-        print(f"{Colors.CYAN}{'-'*50}{Colors.ENDC}")
+            self.emit(f"{Colors.BLUE}[TEST MODE: No changes will be made]{Colors.ENDC}")
+        self.emit(f"{Colors.CYAN}{'-'*50}{Colors.ENDC}")
+        # Flush at each step boundary so long-running steps still show progress
+        self.flush()
 
     def print_success(self, text: str):
         """Print success message."""
-        print(f"{Colors.GREEN}✅ {text}{Colors.ENDC}")
+        self.emit(f"{Colors.GREEN}✅ {text}{Colors.ENDC}")
 
     def print_warning(self, text: str):
         """Print warning message."""
-        print(f"{Colors.WARNING}⚠️  {text}{Colors.ENDC}")
+        self.emit(f"{Colors.WARNING}⚠️  {text}{Colors.ENDC}")
 
     def print_error(self, text: str):
         """Print error message."""
-        print(f"{Colors.FAIL}❌ {text}{Colors.ENDC}")
+        self.emit(f"{Colors.FAIL}❌ {text}{Colors.ENDC}")
 
     def print_info(self, text: str):
         """Print info message."""
-        print(f"{Colors.BLUE}ℹ️  {text}{Colors.ENDC}")
+        self.emit(f"{Colors.BLUE}ℹ️  {text}{Colors.ENDC}")
 
     def mask_sensitive_value(self, value: str, show_chars: int = 4) -> str:
         """Mask sensitive values for safe display."""
@@ -106,20 +212,19 @@ class GitHubSecretsManager:
         """Install required dependencies automatically."""
         self.print_step(1, "Installing Dependencies")
         
-        # Check if we can import required modules
-        missing_modules = []
+        # Probe with find_spec, which locates modules without executing them
+        missing_modules = [
+            package for module, package in DEPENDENCIES.items()
+            if importlib.util.find_spec(module) is None
+        ]
+        
+        if not missing_modules:
+            missing_modules = import_dependencies()
         
-        try:
-            import requests
+        if "requests" not in missing_modules:
             self.print_success("requests library available")
-        except ImportError:
-            missing_modules.append("requests")
-        
-        try:
-            from nacl import public
+        if "PyNaCl" not in missing_modules:
             self.print_success("PyNaCl library available")
-        except ImportError:
-            missing_modules.append("PyNaCl")
         
         if not missing_modules:
             self.print_success("All dependencies are already installed")
@@ -129,27 +234,36 @@ class GitHubSecretsManager:
         
         # Install missing dependencies
         try:
-            if missing_modules:
-                cmd = [sys.executable, "-m", "pip", "install"] + missing_modules
-                result = subprocess.run(cmd, capture_output=True, text=True)
+            cmd = [
+                sys.executable, "-m", "pip", "install",
+                "--disable-pip-version-check", "--no-input",
+                *missing_modules,
+            ]
+            # pip's progress output is never shown; only stderr is kept, as bytes
+            result = subprocess.run(
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+            )
+            
+            if result.returncode == 0:
+                self.print_success("Dependencies installed successfully")
                 
-                if result.returncode == 0:
-                    self.print_success("Dependencies installed successfully")
-                    
-                    # Verify imports now work
-                    try:
-                        import requests
-                        from nacl import public
-                        self.print_success("All imports working correctly")
-                        return True
-                    except ImportError as e:
-                        self.print_error(f"Import still failing after installation: {e}")
-                        return False
-                else:
-                    self.print_error("Failed to install dependencies")
-                    self.print_info("Try running manually: pip install requests PyNaCl")
+                # Verify imports now work
+                importlib.invalidate_caches()
+                still_missing = import_dependencies()
+                if still_missing:
+                    self.print_error(f"Import still failing after installation: {', '.join(still_missing)}")
                     return False
-                    
+                self.print_success("All imports working correctly")
+                return True
+            else:
+                self.print_error("Failed to install dependencies")
+                # Decode only the tail of stderr, where pip reports the failure
+                error_tail = result.stderr[-4096:].decode("utf-8", "replace").strip()
+                if error_tail:
+                    self.print_info(error_tail.splitlines()[-1])
+                self.print_info("Try running manually: pip install requests PyNaCl")
+                return False
+                
         except Exception as e:
             self.print_error(f"Error installing dependencies: {e}")
             return False
@@ -163,8 +277,7 @@ class GitHubSecretsManager:
                 self.print_error(f"Configuration file not found: {self.config_file}")
                 return False
             
-            with open(self.config_file, 'r') as f:
-                self.config = json.load(f)
+            self.config = _json.loads(self.config_file.read_bytes())
             
             self.print_success(f"Loaded configuration from {self.config_file}")
             
@@ -211,8 +324,6 @@ class GitHubSecretsManager:
     def setup_github_session(self) -> bool:
         """Setup GitHub API session."""
         try:
-            import requests
-            
             self.session = requests.Session()
             github_config = self.config['github']
             
@@ -245,7 +356,7 @@ class GitHubSecretsManager:
             response = self.session.get(f"{self.github_api_base}/repos/{repository}")
             
             if response.status_code == 200:
-                repo_data = response.json()
+                repo_data = _json.loads(response.content)
                 self.print_success(f"Repository access confirmed: {repo_data['full_name']}")
                 
                 # Check admin permissions
@@ -258,7 +369,7 @@ class GitHubSecretsManager:
                 # Test public key endpoint
                 pub_key_response = self.session.get(f"{self.github_api_base}/repos/{repository}/actions/secrets/public-key")
                 if pub_key_response.status_code == 200:
-                    pub_key_data = pub_key_response.json()
+                    pub_key_data = _json.loads(pub_key_response.content)
                     self.print_success("Repository public key accessible")
                     # SECURITY: Don't log the actual key, just confirm we can access it
                     self.print_info(f"Public key ID: {pub_key_data.get('key_id', 'unknown')}")
@@ -282,28 +393,35 @@ class GitHubSecretsManager:
             return False
 
     def test_p12_certificate(self, cert_path: Path, password: str) -> bool:
-        """Test P12 certificate with OpenSSL 3.x compatibility."""
+        """Test P12 certificate with OpenSSL 3.x compatibility.
+
+        The -legacy (OpenSSL 3.x) and plain (older OpenSSL) checks are started
+        together; the first success wins and the other process is terminated.
+        """
+        # SECURITY: Never log the password in error messages
+        args = ['-in', str(cert_path), '-noout', '-passin', f'pass:{password}']
+        processes = []
         try:
-            # SECURITY: Never log the password in error messages
-            # Try with -legacy flag first (OpenSSL 3.x)
-            result = subprocess.run([
-                'openssl', 'pkcs12', '-legacy', '-in', str(cert_path), 
-                '-noout', '-passin', f'pass:{password}'
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
+            for extra_args in (['-legacy'], []):
+                processes.append(subprocess.Popen(
+                    ['openssl', 'pkcs12', *extra_args, *args],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                ))
+
+            # -legacy is the expected path on OpenSSL 3.x, so wait on it first;
+            # the plain check only matters if that one fails
+            legacy_check, plain_check = processes
+            if legacy_check.wait() == 0:
                 return True
-            
-            # Try without -legacy flag (older OpenSSL)
-            result = subprocess.run([
-                'openssl', 'pkcs12', '-in', str(cert_path), 
-                '-noout', '-passin', f'pass:{password}'
-            ], capture_output=True, text=True)
-            
-            return result.returncode == 0
-            
+            return plain_check.wait() == 0
+
         except Exception:
             return False
+        finally:
+            for process in processes:
+                if process.poll() is None:
+                    process.terminate()
+                    process.wait()
 
     def find_and_validate_certificates(self) -> Tuple[Optional[Path], Optional[Path]]:
         """Find and validate P12 certificate files."""
@@ -313,15 +431,17 @@ class GitHubSecretsManager:
         p12_path_config = self.config['apple_developer'].get('p12_path', 'apple_credentials/certificates')
         p12_password = self.config['apple_developer'].get('p12_password')
         
-        # Resolve P12 path
-        if Path(p12_path_config).is_absolute():
-            p12_base_path = Path(p2_path_config)
-        else:
-            p12_base_path = self.project_root / p12_path_config
+        # Resolve P12 path once and reuse it on later calls
+        if self._p12_base_path is None:
+            if Path(p12_path_config).is_absolute():
+                p12_base_path = Path(p12_path_config)
+            else:
+                p12_base_path = self.project_root / p12_path_config
+            self._p12_base_path = p12_base_path.resolve()
         
         # Search for certificate files
         search_paths = [
-            p12_base_path,
+            self._p12_base_path,
             self.project_root / ".github" / "scripts",
             self.project_root,
         ]
@@ -335,29 +455,40 @@ class GitHubSecretsManager:
             'installer': ['installer_cert.p12', 'installer.p12', 'developerID_installer.p12']
         }
         
+        wanted_names = {name.lower() for names in cert_names.values() for name in names}
+        
         for search_path in search_paths:
-            if not search_path.exists():
+            if app_cert is not None and installer_cert is not None:
+                break
+            
+            # One directory scan per search path instead of a stat per candidate.
+            # Names are compared case-insensitively to match APFS lookups, and
+            # is_file() follows symlinks so broken links are skipped.
+            try:
+                with os.scandir(search_path) as entries:
+                    present = {
+                        entry.name.lower(): entry.name
+                        for entry in entries
+                        if entry.name.lower() in wanted_names and entry.is_file()
+                    }
+            except OSError:
                 continue
                 
             self.print_info(f"Searching in: {search_path}")
             
-            # Look for application certificate
+            # Look for application certificate (candidate order is the priority)
             if app_cert is None:
-                for name in cert_names['app']:
-                    cert_path = search_path / name
-                    if cert_path.exists():
-                        app_cert = cert_path
-                        self.print_success(f"Found application certificate: {cert_path}")
-                        break
+                name = next((present[n.lower()] for n in cert_names['app'] if n.lower() in present), None)
+                if name:
+                    app_cert = search_path / name
+                    self.print_success(f"Found application certificate: {app_cert}")
             
             # Look for installer certificate
             if installer_cert is None:
-                for name in cert_names['installer']:
-                    cert_path = search_path / name
-                    if cert_path.exists():
-                        installer_cert = cert_path
-                        self.print_success(f"Found installer certificate: {cert_path}")
-                        break
+                name = next((present[n.lower()] for n in cert_names['installer'] if n.lower() in present), None)
+                if name:
+                    installer_cert = search_path / name
+                    self.print_success(f"Found installer certificate: {installer_cert}")
         
         if not app_cert:
             self.print_error("Application certificate not found")
@@ -372,11 +503,15 @@ class GitHubSecretsManager:
         # Validate certificates
         self.print_info("Validating certificates...")
         
-        if not self.test_p12_certificate(app_cert, p12_password):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            app_valid = executor.submit(self.test_p12_certificate, app_cert, p12_password)
+            installer_valid = executor.submit(self.test_p12_certificate, installer_cert, p12_password)
+
+        if not app_valid.result():
             self.print_error("Application certificate validation failed")
             return None, None
         
-        if not self.test_p12_certificate(installer_cert, p12_password):
+        if not installer_valid.result():
             self.print_error("Installer certificate validation failed")
             return None, None
         
@@ -404,15 +539,11 @@ class GitHubSecretsManager:
         
         # Convert P12 certificates to base64
         try:
-            with open(app_cert, 'rb') as f:
-                app_cert_data = f.read()
-            self.secrets['APPLE_DEVELOPER_ID_APPLICATION_CERT'] = base64.b64encode(app_cert_data).decode('utf-8')
+            self.secrets['APPLE_DEVELOPER_ID_APPLICATION_CERT'] = b64encode_file(app_cert)
             # SECURITY: Show size but not content
             self.print_success(f"Application certificate: {len(self.secrets['APPLE_DEVELOPER_ID_APPLICATION_CERT'])} chars")
             
-            with open(installer_cert, 'rb') as f:
-                installer_cert_data = f.read()
-            self.secrets['APPLE_DEVELOPER_ID_INSTALLER_CERT'] = base64.b64encode(installer_cert_data).decode('utf-8')
+            self.secrets['APPLE_DEVELOPER_ID_INSTALLER_CERT'] = b64encode_file(installer_cert)
             # SECURITY: Show size but not content
             self.print_success(f"Installer certificate: {len(self.secrets['APPLE_DEVELOPER_ID_INSTALLER_CERT'])} chars")
             
@@ -436,9 +567,7 @@ class GitHubSecretsManager:
                 
                 if api_key_path.exists():
                     try:
-                        with open(api_key_path, 'rb') as f:
-                            api_key_data = f.read()
-                        self.secrets['APP_STORE_CONNECT_API_KEY'] = base64.b64encode(api_key_data).decode('utf-8')
+                        self.secrets['APP_STORE_CONNECT_API_KEY'] = b64encode_file(api_key_path)
                         # SECURITY: Show size but not content
                         self.print_success(f"App Store Connect API key: {len(self.secrets['APP_STORE_CONNECT_API_KEY'])} chars")
                     except Exception as e:
@@ -468,22 +597,18 @@ class GitHubSecretsManager:
         self.print_success(f"Prepared {total_secrets} total secrets ({required_secrets} required for signing)")
         return True
 
-    def encrypt_secret(self, secret_value: str, public_key_data: str) -> Optional[str]:
-        """Encrypt a secret value using GitHub's libsodium encryption."""
+    def encrypt_secret(self, secret_value: Union[str, bytes], sealed_box: "SealedBox") -> Optional[str]:
+        """Encrypt a secret value with a prebuilt SealedBox for the repository public key.
+
+        Large payloads such as base64-encoded certificates are passed as bytes
+        and encrypted as-is.
+        """
         try:
-            from nacl import public
-            
-            # Decode the public key from base64
-            public_key_bytes = base64.b64decode(public_key_data)
-            
-            # Create a public key object using PyNaCl
-            public_key = public.PublicKey(public_key_bytes)
+            if isinstance(secret_value, str):
+                secret_value = secret_value.encode('utf-8')
             
-            # Create a sealed box for encryption
-            sealed_box = public.SealedBox(public_key)
-            
-            # Encrypt the secret value
-            encrypted_bytes = sealed_box.encrypt(secret_value.encode('utf-8'))
+            # Encrypt the secret value with the repository's sealed box
+            encrypted_bytes = sealed_box.encrypt(secret_value)
             
             # Return base64 encoded encrypted data
             return base64.b64encode(encrypted_bytes).decode('utf-8')
@@ -510,7 +635,11 @@ class GitHubSecretsManager:
                 self.print_error(f"Failed to get repository public key: {response.status_code}")
                 return False
             
-            public_key = response.json()
+            public_key = _json.loads(response.content)
+            # Build the sealed box once and reuse it for every secret
+            sealed_box = nacl_public.SealedBox(
+                nacl_public.PublicKey(base64.b64decode(public_key['key']))
+            )
             self.print_success("Retrieved repository public key for encryption")
             
         except Exception as e:
@@ -523,7 +652,7 @@ class GitHubSecretsManager:
             try:
                 response = self.session.get(f"{self.github_api_base}/repos/{repository}/actions/secrets")
                 if response.status_code == 200:
-                    secrets_data = response.json()
+                    secrets_data = _json.loads(response.content)
                     existing_secrets = [secret['name'] for secret in secrets_data.get('secrets', [])]
                     self.print_info(f"Found {len(existing_secrets)} existing secrets")
             except Exception:
@@ -534,40 +663,58 @@ class GitHubSecretsManager:
         update_count = 0
         create_count = 0
         
-        for secret_name, secret_value in self.secrets.items():
-            is_update = secret_name in existing_secrets
-            
+        def put_secret(secret_name: str, secret_value: Union[str, bytes]):
             # Encrypt the secret value
-            encrypted_value = self.encrypt_secret(secret_value, public_key['key'])
+            encrypted_value = self.encrypt_secret(secret_value, sealed_box)
             if not encrypted_value:
-                self.print_error(f"Failed to encrypt secret: {secret_name}")
-                continue
+                return None
             
             # Prepare the request payload
             payload = {
                 'encrypted_value': encrypted_value,
                 'key_id': public_key['key_id']
             }
+            return self.session.put(
+                f"{self.github_api_base}/repos/{repository}/actions/secrets/{secret_name}",
+                json=payload
+            )
+        
+        # Secrets are independent, so upload them concurrently; results are
+        # collected as each request completes
+        results = {}
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_UPLOADS) as executor:
+            futures = {
+                executor.submit(put_secret, secret_name, secret_value): secret_name
+                for secret_name, secret_value in self.secrets.items()
+            }
+            for future in as_completed(futures):
+                secret_name = futures[future]
+                try:
+                    results[secret_name] = (future.result(), None)
+                except Exception as e:
+                    results[secret_name] = (None, e)
+        
+        # Report in name order so the output is identical from run to run
+        for secret_name in sorted(results):
+            response, error = results[secret_name]
+            is_update = secret_name in existing_secrets
             
-            try:
-                response = self.session.put(
-                    f"{self.github_api_base}/repos/{repository}/actions/secrets/{secret_name}",
-                    json=payload
-                )
-                
-                if response.status_code in [201, 204]:
-                    if self.force_update or is_update:
-                        self.print_success(f"🔥 Updated secret: {secret_name}")
-                        update_count += 1
-                    else:
-                        self.print_success(f"Created secret: {secret_name}")
-                        create_count += 1
-                    success_count += 1
+            if error is not None:
+                self.print_error(f"Error setting secret {secret_name}: {error}")
+            elif response is None:
+                self.print_error(f"Failed to encrypt secret: {secret_name}")
+            elif response.status_code in [201, 204]:
+                if self.force_update or is_update:
+                    self.print_success(f"🔥 Updated secret: {secret_name}")
+                    update_count += 1
                 else:
-                    self.print_error(f"Failed to set secret {secret_name}: {response.status_code}")
-                    
-            except Exception as e:
-                self.print_error(f"Error setting secret {secret_name}: {e}")
+                    self.print_success(f"Created secret: {secret_name}")
+                    create_count += 1
+                success_count += 1
+                # Release the payload now; only the name is needed for the summary
+                self.secrets[secret_name] = None
+            else:
+                self.print_error(f"Failed to set secret {secret_name}: {response.status_code}")
         
         # Summary
         total_secrets = len(self.secrets)
@@ -586,54 +733,32 @@ class GitHubSecretsManager:
         
         repository = self.config['github']['repository']
         
-        print(f"{Colors.BOLD}Repository:{Colors.ENDC} {repository}")
+        self.emit(f"{Colors.BOLD}Repository:{Colors.ENDC} {repository}")
         if self.test_only:
-            print(f"{Colors.BLUE}Mode: TEST ONLY (no changes made){Colors.ENDC}")
+            self.emit(f"{Colors.BLUE}Mode: TEST ONLY (no changes made){Colors.ENDC}")
         elif self.force_update:
-            print(f"{Colors.WARNING}Mode: FORCE UPDATE (all secrets refreshed){Colors.ENDC}")
+            self.emit(f"{Colors.WARNING}Mode: FORCE UPDATE (all secrets refreshed){Colors.ENDC}")
         else:
-            print(f"{Colors.BLUE}Mode: Idempotent (only missing/changed secrets updated){Colors.ENDC}")
-        
-        print(f"{Colors.BOLD}Secrets configured:{Colors.ENDC}")
-        
-        # Group secrets by category
-        categories = {
-            'macOS Signing (Required)': [
-                'APPLE_DEVELOPER_ID_APPLICATION_CERT',
-                'APPLE_DEVELOPER_ID_INSTALLER_CERT',
-                'APPLE_CERT_PASSWORD',
-                'APPLE_ID',
-                'APPLE_ID_PASSWORD',
-                'APPLE_TEAM_ID'
-            ],
-            'App Store Connect (Optional)': [
-                'APP_STORE_CONNECT_KEY_ID',
-                'APP_STORE_CONNECT_ISSUER_ID',
-                'APP_STORE_CONNECT_API_KEY'
-            ],
-            'Build Configuration': [
-                'ENABLE_APP_STORE_BUILD',
-                'ENABLE_APP_STORE_SUBMISSION',
-                'ENABLE_NOTARIZATION'
-            ],
-            'App Information': [
-                'APP_BUNDLE_ID_PREFIX',
-                'APP_AUTHOR_NAME',
-                'APP_AUTHOR_EMAIL'
-            ]
-        }
+            self.emit(f"{Colors.BLUE}Mode: Idempotent (only missing/changed secrets updated){Colors.ENDC}")
+        
+        self.emit(f"{Colors.BOLD}Secrets configured:{Colors.ENDC}")
+        
+        # Group secrets by category in a single pass
+        buckets = defaultdict(list)
+        for secret_name in self.secrets:
+            buckets[_SECRET_TO_CATEGORY.get(secret_name, 'Other')].append(secret_name)
         
-        for category, secret_names in categories.items():
-            found_secrets = [name for name in secret_names if name in self.secrets]
+        for category in [*SECRET_CATEGORIES, 'Other']:
+            found_secrets = buckets.get(category)
             if found_secrets:
-                print(f"\n{Colors.CYAN}{category}:{Colors.ENDC}")
+                self.emit(f"\n{Colors.CYAN}{category}:{Colors.ENDC}")
                 for secret_name in found_secrets:
                     if self.test_only:
-                        print(f"  {Colors.BLUE}🧪 {secret_name}{Colors.ENDC}")
+                        self.emit(f"  {Colors.BLUE}🧪 {secret_name}{Colors.ENDC}")
                     elif self.force_update:
-                        print(f"  {Colors.WARNING}🔥 {secret_name}{Colors.ENDC}")
+                        self.emit(f"  {Colors.WARNING}🔥 {secret_name}{Colors.ENDC}")
                     else:
-                        print(f"  {Colors.GREEN}✓ {secret_name}{Colors.ENDC}")
+                        self.emit(f"  {Colors.GREEN}✓ {secret_name}{Colors.ENDC}")
 
     def run(self) -> bool:
         """Run the complete secrets setup process."""
@@ -648,16 +773,16 @@ class GitHubSecretsManager:
         mode_text = " + ".join(mode_parts)
         self.print_header(f"R2MIDI GitHub Secrets Manager ({mode_text})")
         
-        print("This tool automatically creates/updates ALL GitHub secrets needed for:")
-        print("• macOS code signing and notarization")
-        print("• DMG and PKG installer creation")
-        print("• App Store Connect integration")
-        print("• Automated build and release workflows")
+        self.emit("This tool automatically creates/updates ALL GitHub secrets needed for:")
+        self.emit("• macOS code signing and notarization")
+        self.emit("• DMG and PKG installer creation")
+        self.emit("• App Store Connect integration")
+        self.emit("• Automated build and release workflows")
         
         if self.test_only:
-            print(f"\n{Colors.BLUE}🧪 TEST MODE: Will validate everything but make no changes{Colors.ENDC}")
+            self.emit(f"\n{Colors.BLUE}🧪 TEST MODE: Will validate everything but make no changes{Colors.ENDC}")
         if self.force_update:
-            print(f"\n{Colors.WARNING}🔥 FORCE MODE: All secrets will be updated regardless of current state{Colors.ENDC}")
+            self.emit(f"\n{Colors.WARNING}🔥 FORCE MODE: All secrets will be updated regardless of current state{Colors.ENDC}")
         
         try:
             # Step 1: Install dependencies
@@ -706,6 +831,8 @@ class GitHubSecretsManager:
         except Exception as e:
             self.print_error(f"Setup failed: {e}")
             return False
+        finally:
+            self.flush()
 
 
 def main():
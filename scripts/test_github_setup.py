@@ -10,19 +10,51 @@ Usage:
     python scripts/test_github_setup.py
 """
 
+import functools
+import importlib.util
 import json
+import mmap
 import os
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 try:
-    import requests
-    from nacl import public
-    DEPENDENCIES_OK = True
-except ImportError as e:
-    print(f"❌ Missing dependency: {e}")
-    DEPENDENCIES_OK = False
+    import orjson as _json
+except ImportError:
+    _json = json
+
+
+def _module_available(name: str) -> bool:
+    """Check for a module, trusting sys.modules before searching sys.path."""
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+# Locate (without importing) the runtime dependencies; requests is only
+# imported once the GitHub access test actually needs it
+MISSING_DEPENDENCIES = [
+    module for module in ('requests', 'nacl') if not _module_available(module)
+]
+DEPENDENCIES_OK = not MISSING_DEPENDENCIES
+if not DEPENDENCIES_OK:
+    print(f"❌ Missing dependency: {', '.join(MISSING_DEPENDENCIES)}")
+
+
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+# openssl -legacy errors that are worth retrying without the flag
+OPENSSL_RETRY_HINTS = ('legacy', 'unsupported', 'algorithm')
+# Fine-grained and classic personal access token prefixes
+GITHUB_TOKEN_PREFIXES = ('github_pat_', 'ghp_')
+REPOSITORY_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    nameWithOwner
+    viewerPermission
+  }
+}
+"""
 
 
 class Colors:
@@ -34,265 +66,404 @@ class Colors:
     BOLD = "\033[1m"
 
 
+# Message templates with the colour codes baked in once at import time
+_FMT_OK = f"{Colors.GREEN}✅ %s{Colors.ENDC}"
+_FMT_WARN = f"{Colors.WARNING}⚠️  %s{Colors.ENDC}"
+_FMT_ERR = f"{Colors.FAIL}❌ %s{Colors.ENDC}"
+_FMT_INFO = f"{Colors.BLUE}ℹ️  %s{Colors.ENDC}"
+
+# Certificates and GitHub Access run concurrently; keep their lines whole
+_print_lock = threading.Lock()
+
+
+def _print(text: str):
+    with _print_lock:
+        print(text)
+
+
 def print_success(text: str):
-    print(f"{Colors.GREEN}✅ {text}{Colors.ENDC}")
+    _print(_FMT_OK % text)
 
 
 def print_warning(text: str):
-    print(f"{Colors.WARNING}⚠️  {text}{Colors.ENDC}")
+    _print(_FMT_WARN % text)
 
 
 def print_error(text: str):
-    print(f"{Colors.FAIL}❌ {text}{Colors.ENDC}")
+    _print(_FMT_ERR % text)
 
 
 def print_info(text: str):
-    print(f"{Colors.BLUE}ℹ️  {text}{Colors.ENDC}")
+    _print(_FMT_INFO % text)
 
 
-def test_dependencies():
-    """Test if all required dependencies are available."""
-    print(f"\n{Colors.BOLD}Testing Dependencies{Colors.ENDC}")
-    print("-" * 30)
-    
-    if not DEPENDENCIES_OK:
-        print_error("Missing required Python packages")
-        print_info("Install with: pip install requests PyNaCl")
+class Reporter:
+    """Collects one test stage's output and writes it in a single call.
+
+    Used as a context manager; the buffered lines are flushed on exit so
+    concurrent stages never interleave.
+    """
+
+    def __init__(self, title: str):
+        self._lines = [f"\n{Colors.BOLD}{title}{Colors.ENDC}\n{'-' * 30}\n"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
         return False
+
+    def success(self, text: str):
+        self._lines.append(_FMT_OK % text + "\n")
+
+    def warning(self, text: str):
+        self._lines.append(_FMT_WARN % text + "\n")
+
+    def error(self, text: str):
+        self._lines.append(_FMT_ERR % text + "\n")
+
+    def info(self, text: str):
+        self._lines.append(_FMT_INFO % text + "\n")
+
+    def flush(self):
+        if self._lines:
+            with _print_lock:
+                sys.stdout.write("".join(self._lines))
+                sys.stdout.flush()
+            self._lines.clear()
+
+
+@functools.lru_cache(maxsize=1)
+def _load_config(config_file: Path):
+    """Read and parse the configuration file once.
+
+    Returns a ``(config, error)`` pair; failures are cached as well so later
+    tests report the same error without touching the disk again.
+    """
+    try:
+        with open(config_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return _json.loads(b""), None
+            # Parse straight from the mapped pages; orjson accepts the buffer
+            # without a copy, the stdlib parser needs bytes
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return _json.loads(view if _json is not json else bytes(view)), None
+    except ValueError as e:
+        # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
+        return None, f"Invalid JSON in configuration: {e}"
+    except Exception as e:
+        return None, f"Error reading configuration: {e}"
+
+
+@functools.lru_cache(maxsize=4)
+def _read_cert(cert_path: Path, mtime_ns: int) -> bytes:
+    """Read a certificate file, cached by path and modification time."""
+    return cert_path.read_bytes()
+
+
+@functools.lru_cache(maxsize=4)
+def _gh_session(token: str):
+    """Return a configured GitHub API session, reused per token."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
     
-    print_success("All Python dependencies available")
-    print_info("requests: HTTP client for GitHub API")
-    print_info("PyNaCl: Encryption library for GitHub Secrets")
-    return True
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f"Bearer {token}",
+        'Accept': 'application/vnd.github+json',
+        'X-GitHub-Api-Version': '2022-11-28'
+    })
+    # Requests only go to api.github.com, so keep a single small pool and
+    # retry transient gateway errors
+    retry = Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry))
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def _load_pkcs12():
+    """Import cryptography's PKCS#12 loader on first use, or None if absent.
+
+    It is optional and only used for certificate validation, so its import
+    cost is not paid on startup.
+    """
+    if not _module_available('cryptography'):
+        return None
+    from cryptography.hazmat.primitives.serialization import pkcs12
+    return pkcs12
+
+
+def test_dependencies():
+    """Test if all required dependencies are available."""
+    with Reporter("Testing Dependencies") as r:
+        if not DEPENDENCIES_OK:
+            r.error("Missing required Python packages")
+            r.info("Install with: pip install requests PyNaCl")
+            return False
+        
+        r.success("All Python dependencies available")
+        r.info("requests: HTTP client for GitHub API")
+        r.info("PyNaCl: Encryption library for GitHub Secrets")
+        return True
 
 
 def test_configuration():
     """Test configuration file."""
-    print(f"\n{Colors.BOLD}Testing Configuration{Colors.ENDC}")
-    print("-" * 30)
-    
-    project_root = Path(__file__).parent.parent
-    config_file = project_root / "apple_credentials" / "config" / "app_config.json"
-    
-    if not config_file.exists():
-        print_error(f"Configuration file not found: {config_file}")
-        return False
-    
-    try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+    with Reporter("Testing Configuration") as r:
+        project_root = Path(__file__).parent.parent
+        config_file = project_root / "apple_credentials" / "config" / "app_config.json"
         
-        print_success("Configuration file loaded successfully")
-        
-        # Check required sections
-        required_sections = ['apple_developer', 'github']
-        for section in required_sections:
-            if section not in config:
-                print_error(f"Missing section '{section}' in configuration")
-                return False
-            print_success(f"Section '{section}' found")
+        if not config_file.exists():
+            r.error(f"Configuration file not found: {config_file}")
+            return False
         
-        # Check Apple Developer configuration
-        apple_config = config['apple_developer']
-        required_apple_fields = ['apple_id', 'team_id', 'p12_password', 'app_specific_password']
+        config, error = _load_config(config_file)
+        if error:
+            r.error(error)
+            return False
         
-        for field in required_apple_fields:
-            if field in apple_config and apple_config[field]:
-                print_success(f"Apple field '{field}': ✓")
+        try:
+            r.success("Configuration file loaded successfully")
+            
+            # Check required sections
+            required_sections = ['apple_developer', 'github']
+            for section in required_sections:
+                if section not in config:
+                    r.error(f"Missing section '{section}' in configuration")
+                    return False
+                r.success(f"Section '{section}' found")
+            
+            # Check Apple Developer configuration
+            apple_config = config['apple_developer']
+            required_apple_fields = ['apple_id', 'team_id', 'p12_password', 'app_specific_password']
+            
+            # Fields with non-empty values, collected in one pass
+            present_apple = {key for key, value in apple_config.items() if value}
+            missing_apple = [f for f in required_apple_fields if f not in present_apple]
+            
+            for field in required_apple_fields:
+                if field in present_apple:
+                    r.success(f"Apple field '{field}': ✓")
+            if missing_apple:
+                r.error(f"Missing or empty Apple field(s): {', '.join(missing_apple)}")
+                return False
+            
+            # Check GitHub configuration
+            github_config = config['github']
+            present_github = {key for key, value in github_config.items() if value}
+            if 'repository' in present_github:
+                r.success(f"Repository: {github_config['repository']}")
             else:
-                print_error(f"Missing or empty Apple field: {field}")
+                r.error("Missing GitHub repository")
                 return False
-        
-        # Check GitHub configuration
-        github_config = config['github']
-        if 'repository' in github_config and github_config['repository']:
-            print_success(f"Repository: {github_config['repository']}")
-        else:
-            print_error("Missing GitHub repository")
-            return False
-        
-        if 'personal_access_token' in github_config and github_config['personal_access_token']:
-            token = github_config['personal_access_token']
-            if token.startswith('github_pat_') or token.startswith('ghp_'):
-                print_success("GitHub token format looks valid")
+            
+            if 'personal_access_token' in present_github:
+                token = github_config['personal_access_token']
+                if token.startswith(GITHUB_TOKEN_PREFIXES):
+                    r.success("GitHub token format looks valid")
+                else:
+                    r.warning("GitHub token format may be invalid")
             else:
-                print_warning("GitHub token format may be invalid")
-        else:
-            print_error("Missing GitHub personal access token")
-            return False
-        
-        return True
+                r.error("Missing GitHub personal access token")
+                return False
+            
+            return True
         
-    except json.JSONDecodeError as e:
-        print_error(f"Invalid JSON in configuration: {e}")
-        return False
-    except Exception as e:
-        print_error(f"Error reading configuration: {e}")
-        return False
+        except Exception as e:
+            r.error(f"Error reading configuration: {e}")
+            return False
 
 
 def test_certificates():
     """Test P12 certificate files."""
-    print(f"\n{Colors.BOLD}Testing Certificates{Colors.ENDC}")
-    print("-" * 30)
-    
-    project_root = Path(__file__).parent.parent
-    
-    # Load config to get password
-    config_file = project_root / "apple_credentials" / "config" / "app_config.json"
-    try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        password = config['apple_developer']['p12_password']
-    except:
-        print_error("Could not load P12 password from configuration")
-        return False
-    
-    # Search for certificates
-    search_paths = [
-        project_root / "apple_credentials" / "certificates",
-        project_root / ".github" / "scripts",
-        project_root,
-    ]
-    
-    app_cert = None
-    installer_cert = None
-    
-    for search_path in search_paths:
-        if not search_path.exists():
-            continue
+    with Reporter("Testing Certificates") as r:
+        project_root = Path(__file__).parent.parent
         
-        # Look for app certificate
-        for name in ['app_cert.p12', 'application_cert.p12']:
-            cert_path = search_path / name
-            if cert_path.exists():
-                app_cert = cert_path
-                break
+        # Load config to get password
+        config_file = project_root / "apple_credentials" / "config" / "app_config.json"
+        config, _ = _load_config(config_file)
+        try:
+            password = config['apple_developer']['p12_password']
+        except (KeyError, TypeError):
+            r.error("Could not load P12 password from configuration")
+            return False
         
-        # Look for installer certificate
-        for name in ['installer_cert.p12', 'installer.p12']:
-            cert_path = search_path / name
-            if cert_path.exists():
-                installer_cert = cert_path
-                break
+        # Search for certificates
+        search_paths = [
+            project_root / "apple_credentials" / "certificates",
+            project_root / ".github" / "scripts",
+            project_root,
+        ]
         
-        if app_cert and installer_cert:
-            break
-    
-    if not app_cert:
-        print_error("Application certificate (app_cert.p12) not found")
-        return False
-    
-    if not installer_cert:
-        print_error("Installer certificate (installer_cert.p12) not found")
-        return False
-    
-    print_success(f"Application certificate: {app_cert}")
-    print_success(f"Installer certificate: {installer_cert}")
-    
-    # Test certificate validity
-    def test_cert(cert_path, cert_type):
-        try:
-            # Try with legacy flag first
-            result = subprocess.run([
-                'openssl', 'pkcs12', '-legacy', '-in', str(cert_path),
-                '-noout', '-passin', f'pass:{password}'
-            ], capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                print_success(f"{cert_type} certificate validation: ✓")
-                return True
+        app_cert = None
+        installer_cert = None
+        
+        app_names = ('app_cert.p12', 'application_cert.p12')
+        installer_names = ('installer_cert.p12', 'installer.p12')
+        wanted_names = set(app_names + installer_names)
+        
+        for search_path in search_paths:
+            # One scandir per directory instead of a stat per candidate name.
+            # Match case-insensitively like APFS, and let is_file() follow symlinks
+            # so broken links are skipped as exists() did.
+            try:
+                with os.scandir(search_path) as it:
+                    entries = {
+                        e.name.lower(): e.path for e in it
+                        if e.name.lower() in wanted_names and e.is_file()
+                    }
+            except OSError:
+                continue
             
-            # Try without legacy flag
-            result = subprocess.run([
-                'openssl', 'pkcs12', '-in', str(cert_path),
-                '-noout', '-passin', f'pass:{password}'
-            ], capture_output=True, text=True)
+            # Look for app certificate
+            found = next((entries[n] for n in app_names if n in entries), None)
+            if found:
+                app_cert = Path(found)
             
-            if result.returncode == 0:
-                print_success(f"{cert_type} certificate validation: ✓")
-                return True
+            # Look for installer certificate
+            found = next((entries[n] for n in installer_names if n in entries), None)
+            if found:
+                installer_cert = Path(found)
             
-            print_error(f"{cert_type} certificate validation failed")
-            print_info(f"Error: {result.stderr.strip()}")
+            if app_cert and installer_cert:
+                break
+        
+        if not app_cert:
+            r.error("Application certificate (app_cert.p12) not found")
             return False
-            
-        except Exception as e:
-            print_error(f"Error testing {cert_type} certificate: {e}")
+        
+        if not installer_cert:
+            r.error("Installer certificate (installer_cert.p12) not found")
             return False
-    
-    app_valid = test_cert(app_cert, "Application")
-    installer_valid = test_cert(installer_cert, "Installer")
-    
-    return app_valid and installer_valid
+        
+        r.success(f"Application certificate: {app_cert}")
+        r.success(f"Installer certificate: {installer_cert}")
+        
+        # Test certificate validity
+        def test_cert(cert_path, cert_type):
+            try:
+                pkcs12 = _load_pkcs12()
+                if pkcs12 is not None:
+                    cert_data = _read_cert(cert_path, cert_path.stat().st_mtime_ns)
+                    try:
+                        pkcs12.load_key_and_certificates(cert_data, password.encode('utf-8'))
+                        r.success(f"{cert_type} certificate validation: ✓")
+                        return True
+                    except ValueError:
+                        # Fall back to the openssl CLI, which can enable the legacy provider
+                        pass
+                
+                # Try with legacy flag first
+                result = subprocess.run([
+                    'openssl', 'pkcs12', '-legacy', '-in', str(cert_path),
+                    '-noout', '-passin', f'pass:{password}'
+                ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace')
+                
+                if result.returncode == 0:
+                    r.success(f"{cert_type} certificate validation: ✓")
+                    return True
+                
+                # Dropping -legacy only helps when the flag or its provider is
+                # the problem; a bad password or unreadable file fails either way
+                stderr = result.stderr.lower()
+                if any(hint in stderr for hint in OPENSSL_RETRY_HINTS):
+                    # Try without legacy flag
+                    result = subprocess.run([
+                        'openssl', 'pkcs12', '-in', str(cert_path),
+                        '-noout', '-passin', f'pass:{password}'
+                    ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace')
+                
+                if result.returncode == 0:
+                    r.success(f"{cert_type} certificate validation: ✓")
+                    return True
+                
+                r.error(f"{cert_type} certificate validation failed")
+                r.info(f"Error: {result.stderr.strip()}")
+                return False
+            
+            except Exception as e:
+                r.error(f"Error testing {cert_type} certificate: {e}")
+                return False
+        
+        app_valid = test_cert(app_cert, "Application")
+        installer_valid = test_cert(installer_cert, "Installer")
+        
+        return app_valid and installer_valid
 
 
 def test_github_access():
     """Test GitHub API access."""
-    print(f"\n{Colors.BOLD}Testing GitHub Access{Colors.ENDC}")
-    print("-" * 30)
-    
-    if not DEPENDENCIES_OK:
-        print_error("Cannot test GitHub access - missing dependencies")
-        return False
-    
-    project_root = Path(__file__).parent.parent
-    config_file = project_root / "apple_credentials" / "config" / "app_config.json"
-    
-    try:
-        with open(config_file, 'r') as f:
-            config = json.load(f)
-        
-        github_config = config['github']
-        repository = github_config['repository']
-        token = github_config['personal_access_token']
+    with Reporter("Testing GitHub Access") as r:
+        if not DEPENDENCIES_OK:
+            r.error("Cannot test GitHub access - missing dependencies")
+            return False
         
-        session = requests.Session()
-        session.headers.update({
-            'Authorization': f"Bearer {token}",
-            'Accept': 'application/vnd.github+json',
-            'X-GitHub-Api-Version': '2022-11-28'
-        })
+        project_root = Path(__file__).parent.parent
+        config_file = project_root / "apple_credentials" / "config" / "app_config.json"
         
-        # Test repository access
-        response = session.get(f"https://api.github.com/repos/{repository}")
+        config, error = _load_config(config_file)
+        if error:
+            r.error(error)
+            return False
         
-        if response.status_code == 200:
-            repo_data = response.json()
-            print_success(f"Repository access: {repo_data['full_name']}")
+        try:
+            github_config = config['github']
+            repository = github_config['repository']
+            token = github_config['personal_access_token']
+            
+            session = _gh_session(token)
+            
+            # Test repository access and permissions in one GraphQL round-trip
+            owner, _, name = repository.partition('/')
+            response = session.post(GITHUB_GRAPHQL_URL, json={
+                'query': REPOSITORY_QUERY,
+                'variables': {'owner': owner, 'name': name},
+            })
+            
+            if response.status_code == 401:
+                r.error("GitHub token authentication failed")
+                r.info("Check if your personal access token is valid and has repo scope")
+                return False
+            if response.status_code != 200:
+                r.error(f"GitHub API error: {response.status_code}")
+                return False
+            
+            result = response.json()
+            repo_data = (result.get('data') or {}).get('repository')
+            if repo_data is None:
+                errors = result.get('errors') or []
+                if not errors or any(err.get('type') == 'NOT_FOUND' for err in errors):
+                    r.error(f"Repository not found: {repository}")
+                else:
+                    r.error(f"GitHub API error: {errors[0].get('message', 'unknown error')}")
+                return False
             
-            permissions = repo_data.get('permissions', {})
-            if permissions.get('admin', False):
-                print_success("Admin permissions confirmed")
+            r.success(f"Repository access: {repo_data['nameWithOwner']}")
+            
+            # Only admins can manage repository secrets
+            if repo_data.get('viewerPermission') == 'ADMIN':
+                r.success("Admin permissions confirmed")
             else:
-                print_warning("Admin permissions not detected")
-                print_info("You may not be able to manage repository secrets")
+                r.warning("Admin permissions not detected")
+                r.info("You may not be able to manage repository secrets")
             
             # Test public key endpoint (needed for secrets encryption)
             pub_key_response = session.get(f"https://api.github.com/repos/{repository}/actions/secrets/public-key")
             if pub_key_response.status_code == 200:
-                print_success("Repository public key accessible")
+                r.success("Repository public key accessible")
                 pub_key_data = pub_key_response.json()
-                print_info(f"Public key ID: {pub_key_data['key_id']}")
+                r.info(f"Public key ID: {pub_key_data['key_id']}")
             else:
-                print_warning("Could not access repository public key")
-                print_info("This may indicate insufficient permissions for secrets management")
+                r.warning("Could not access repository public key")
+                r.info("This may indicate insufficient permissions for secrets management")
             
             return True
-        elif response.status_code == 404:
-            print_error(f"Repository not found: {repository}")
-            return False
-        elif response.status_code == 401:
-            print_error("GitHub token authentication failed")
-            print_info("Check if your personal access token is valid and has repo scope")
-            return False
-        else:
-            print_error(f"GitHub API error: {response.status_code}")
-            return False
         
-    except Exception as e:
-        print_error(f"Error testing GitHub access: {e}")
-        return False
+        except Exception as e:
+            r.error(f"Error testing GitHub access: {e}")
+            return False
 
 
 def main():
@@ -300,23 +471,35 @@ def main():
     print(f"{Colors.BOLD}R2MIDI GitHub Secrets Configuration Test{Colors.ENDC}")
     print("=" * 50)
     
-    tests = [
+    # Configuration must load first; the remaining stages are independent
+    serial_tests = [
         ("Dependencies", test_dependencies),
         ("Configuration", test_configuration),
+    ]
+    parallel_tests = [
         ("Certificates", test_certificates),
         ("GitHub Access", test_github_access),
     ]
     
-    all_passed = True
-    
-    for test_name, test_func in tests:
+    def run_test(test_name, test_func):
         try:
-            if not test_func():
-                all_passed = False
+            return test_func()
         except Exception as e:
             print_error(f"Test '{test_name}' failed with exception: {e}")
+            return False
+    
+    all_passed = True
+    
+    for test_name, test_func in serial_tests:
+        if not run_test(test_name, test_func):
             all_passed = False
     
+    with ThreadPoolExecutor(max_workers=len(parallel_tests)) as executor:
+        futures = [executor.submit(run_test, *test) for test in parallel_tests]
+        for future in as_completed(futures):
+            if not future.result():
+                all_passed = False
+    
     print(f"\n{Colors.BOLD}Test Summary{Colors.ENDC}")
     print("=" * 30)
     
@@ -12,6 +12,9 @@ import re
 import sys
 from pathlib import Path
 
+# Top-level `version = "..."` keys only, so keys such as target_version are left alone
+VERSION_PATTERN = re.compile(r'^version\s*=\s*"[^"]*"', re.MULTILINE)
+
 
 def safe_print(message, success=None):
     """Print messages with platform-safe symbols."""
@@ -74,7 +77,7 @@ def update_pyproject(
 
     # Update version
     if version:
-        content = re.sub(r'version = "[^"]*"', f'version = "{version}"', content)
+        content = VERSION_PATTERN.sub(f'version = "{version}"', content)
         safe_print(f"Updated version to: {version}", True)
 
     # Update author
@@ -1,6 +1,12 @@
 import asyncio
+import atexit
+import functools
 import logging
 import logging.config
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 
 # Get logger
@@ -14,47 +20,220 @@ except ImportError:
     logger.error("Failed to import python-rtmidi module")
     rtmidi = None
 
+# Whether the installed binding exposes the python-rtmidi port classes
+_HAS_MIDI_CLASSES = hasattr(rtmidi, "MidiIn") and hasattr(rtmidi, "MidiOut")
+
+# Legacy sendmidi command: dev "Port Name" ch <channel> cc 0 <cc_0> pc <pgm>
+_COMMAND_RE = re.compile(
+    r"""dev\s+(?P<quote>["'])(?P<port>.+?)(?P=quote)
+        \s+ch\s+(?P<ch>\S+)
+        \s+cc\s+0\s+(?P<cc>\S+)
+        \s+pc\s+(?P<pc>\S+)""",
+    re.VERBOSE,
+)
+
+# Parameters after the port name, in order, used to report which one is missing
+_COMMAND_PARAMS = (
+    ("ch", re.compile(r"\bch\s+\S")),
+    ("cc 0", re.compile(r"\bcc\s+0\s+\S")),
+    ("pc", re.compile(r"\bpc\s+\S")),
+)
+
+# Status bytes indexed by channel - 1
+_CC_STATUS = bytes(0xB0 | c for c in range(16))
+_PC_STATUS = bytes(0xC0 | c for c in range(16))
+
+# Per-thread CC (3 byte) and PC (2 byte) message buffers, reused for every send
+_tls = threading.local()
+
+
+def _message_buffers() -> Tuple[bytearray, bytearray]:
+    """Return this thread's reusable CC and PC message buffers"""
+    try:
+        return _tls.buffers
+    except AttributeError:
+        _tls.buffers = (bytearray(3), bytearray(2))
+        return _tls.buffers
+
+
+def _validation_error(
+    channel: int, cc_value: int, pgm_value: int, cc_number: int = 0
+) -> Optional[str]:
+    """Describe the first out-of-range MIDI field, or return None if all are valid"""
+    # Channel must fit in 0-15 after the -1 shift, data bytes in 0-127
+    if not (((channel - 1) & ~0x0F) | ((cc_number | cc_value | pgm_value) & ~0x7F)):
+        return None
+    if channel < 1 or channel > 16:
+        return f"Invalid MIDI channel: {channel}. Must be between 1 and 16."
+    if cc_number < 0 or cc_number > 127:
+        return f"Invalid CC number: {cc_number}. Must be between 0 and 127."
+    if cc_value < 0 or cc_value > 127:
+        return f"Invalid CC value: {cc_value}. Must be between 0 and 127."
+    return f"Invalid program change value: {pgm_value}. Must be between 0 and 127."
+
+
+def _format_error(command: str) -> str:
+    """Describe which part of a command that did not match _COMMAND_RE is missing"""
+    dev = re.search(r"""dev\s+(["'])""", command)
+    if dev is None:
+        return "Invalid command format: missing 'dev' parameter"
+
+    pos = command.find(dev[1], dev.end())
+    if pos < 0:
+        return "Invalid command format: missing closing quote for port name"
+
+    for name, pattern in _COMMAND_PARAMS:
+        param = pattern.search(command, pos)
+        if param is None:
+            return f"Invalid command format: missing '{name}' parameter"
+        pos = param.end()
+
+    return (
+        "Invalid command format: expected "
+        "dev \"<port>\" ch <channel> cc 0 <value> pc <program>"
+    )
+
+
+# How long a port listing is served from cache, in seconds
+_PORTS_TTL = 0.5
+
+# Single worker so MIDI output is serialized and sent in submission order
+_midi_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="midi-out")
+
 
 class MidiUtils:
     """Utilities for MIDI port detection and command execution"""
 
+    # Output ports stay open between sends, keyed by the requested port name
+    _out_cache: Dict[str, "rtmidi.MidiOut"] = {}
+    _cache_lock = threading.Lock()
+
+    # MidiIn/MidiOut pair reused for port enumeration
+    _probe_in: Optional["rtmidi.MidiIn"] = None
+    _probe_out: Optional["rtmidi.MidiOut"] = None
+    _probe_lock = threading.Lock()
+
+    # (monotonic timestamp, ports, output name -> index) of the last successful enumeration
+    _ports_cache: Tuple[float, Optional[Dict[str, List[str]]], Dict[str, int]] = (
+        0.0,
+        None,
+        {},
+    )
+    _ports_cache_lock = threading.Lock()
+
+    @staticmethod
+    def _get_probes() -> Tuple["rtmidi.MidiIn", "rtmidi.MidiOut"]:
+        """
+        Return the shared MidiIn/MidiOut pair used to enumerate ports
+
+        The pair is created on first use so backend initialization happens
+        once per process rather than on every port listing.
+        """
+        with MidiUtils._probe_lock:
+            if MidiUtils._probe_in is None or MidiUtils._probe_out is None:
+                MidiUtils._probe_in = rtmidi.MidiIn()
+                MidiUtils._probe_out = rtmidi.MidiOut()
+            return MidiUtils._probe_in, MidiUtils._probe_out
+
+    @staticmethod
+    def invalidate_probes() -> None:
+        """
+        Drop the shared enumeration pair so the next listing re-initializes it
+
+        Some backends (WinMM, CoreMIDI) only pick up hotplugged devices after
+        the MIDI client is recreated. Called by invalidate_ports_cache, which
+        holds _ports_cache_lock so no enumeration is using the pair.
+        """
+        with MidiUtils._probe_lock:
+            for probe in (MidiUtils._probe_in, MidiUtils._probe_out):
+                if probe is not None:
+                    probe.delete()
+            MidiUtils._probe_in = None
+            MidiUtils._probe_out = None
+
+    @staticmethod
+    def invalidate_ports_cache() -> None:
+        """
+        Force the next get_midi_ports call to enumerate the ports again
+
+        The enumeration pair is recreated as well, so ports added since it
+        was created are seen on every backend.
+        """
+        with MidiUtils._ports_cache_lock:
+            MidiUtils.invalidate_probes()
+            MidiUtils._ports_cache = (0.0, None, {})
+
     @staticmethod
     def get_midi_ports() -> Dict[str, List[str]]:
         """
         Get all available MIDI ports on the system
         Returns a dictionary with 'in' and 'out' keys containing lists of port names
-        """
-        logger.info("Getting MIDI ports...")
 
+        Results are cached for _PORTS_TTL seconds so that bursts of UI polling
+        share one enumeration. Each call returns its own lists, so callers may
+        modify the result without affecting the cache.
+        """
         # Check if rtmidi is available
         if rtmidi is None:
             logger.error("rtmidi module is not available")
             return {"in": [], "out": []}
 
+        ports, _ = MidiUtils._get_ports_snapshot()
+        if ports is None:
+            # Return empty lists as fallback, without caching the failure
+            return {"in": [], "out": []}
+        return {"in": list(ports["in"]), "out": list(ports["out"])}
+
+    @staticmethod
+    def _get_ports_snapshot() -> Tuple[Optional[Dict[str, List[str]]], Dict[str, int]]:
+        """
+        Return the cached port listing and output index, enumerating if stale
+
+        Returns:
+            Tuple of (ports or None on error, output port name -> index)
+        """
+        with MidiUtils._ports_cache_lock:
+            cached_at, ports, out_index = MidiUtils._ports_cache
+            now = time.monotonic()
+            if ports is not None and now - cached_at < _PORTS_TTL:
+                return ports, out_index
+
+            ports = MidiUtils._enumerate_ports()
+            if ports is None:
+                return None, {}
+            out_index = {name: i for i, name in enumerate(ports["out"])}
+            MidiUtils._ports_cache = (now, ports, out_index)
+            return ports, out_index
+
+    @staticmethod
+    def _enumerate_ports() -> Optional[Dict[str, List[str]]]:
+        """Query the MIDI backend for the current in/out port names, or None on error"""
+        logger.info("Getting MIDI ports...")
+
         try:
-            # Try to create MIDI input and output objects using python-rtmidi API
-            try:
-                midi_in = rtmidi.MidiIn()
-                midi_out = rtmidi.MidiOut()
-            except AttributeError:
+            if not _HAS_MIDI_CLASSES:
                 logger.error("rtmidi module does not have MidiIn or MidiOut attributes")
-                return {"in": [], "out": []}
+                return None
+
+            # Reuse the shared MIDI input and output objects for enumeration
+            midi_in, midi_out = MidiUtils._get_probes()
 
             # Get port names using python-rtmidi API
             in_ports = [midi_in.get_port_name(i) for i in range(midi_in.get_port_count())]
             out_ports = [midi_out.get_port_name(i) for i in range(midi_out.get_port_count())]
 
             logger.info(
-                f"Found {len(in_ports)} MIDI in ports and {len(out_ports)} MIDI out ports"
+                "Found %d MIDI in ports and %d MIDI out ports",
+                len(in_ports),
+                len(out_ports),
             )
-            logger.debug(f"MIDI in ports: {in_ports}")
-            logger.debug(f"MIDI out ports: {out_ports}")
+            logger.debug("MIDI in ports: %s", in_ports)
+            logger.debug("MIDI out ports: %s", out_ports)
 
             return {"in": in_ports, "out": out_ports}
         except Exception as e:
             logger.error(f"Error getting MIDI ports: {str(e)}")
-            # Return empty lists as fallback
-            return {"in": [], "out": []}
+            return None
 
     @staticmethod
     def send_midi_command(
@@ -70,129 +249,246 @@ class MidiUtils:
         Returns:
             Tuple of (success, message)
         """
-        logger.info(f"Executing MIDI command: {command}")
+        logger.info("Executing MIDI command: %s", command)
         try:
-            # Parse the command string to extract port name, channel, cc_0, and pgm values
-            # Expected format: legacy sendmidi format: dev "Port Name" ch <channel> cc 0 <cc_0> pc <pgm>
-
-            # Extract port name
-            dev_pos = command.find('dev "')
-            if dev_pos < 0:
-                dev_pos = command.find("dev '")
-                if dev_pos < 0:
-                    return False, "Invalid command format: missing 'dev' parameter"
-                quote_char = "'"
-            else:
-                quote_char = '"'
-
-            port_start_pos = dev_pos + 5  # Position after 'dev "'
-            port_end_pos = command.find(quote_char, port_start_pos)
-            if port_end_pos < 0:
-                return (
-                    False,
-                    "Invalid command format: missing closing quote for port name",
-                )
+            parsed, error = MidiUtils._parse_command(command)
+            if parsed is None:
+                return False, error
 
-            port_name = command[port_start_pos:port_end_pos]
+            return MidiUtils.send_preset_change(*parsed, sequencer_port)
 
-            # Extract channel
-            ch_pos = command.find("ch ", port_end_pos)
-            if ch_pos < 0:
-                return False, "Invalid command format: missing 'ch' parameter"
+        except Exception as e:
+            logger.error(f"Unexpected error executing MIDI command: {str(e)}")
+            return False, f"Unexpected error: {str(e)}"
 
-            ch_start_pos = ch_pos + 3  # Position after 'ch '
-            ch_end_pos = command.find(" ", ch_start_pos)
-            if ch_end_pos < 0:
-                ch_end_pos = len(command)
+    @staticmethod
+    def _parse_command(
+        command: str,
+    ) -> Tuple[Optional[Tuple[str, int, int, int]], str]:
+        """
+        Parse and validate a legacy sendmidi command
 
-            try:
-                channel = int(command[ch_start_pos:ch_end_pos])
-                if channel < 1 or channel > 16:
-                    return (
-                        False,
-                        f"Invalid MIDI channel: {channel}. Must be between 1 and 16.",
-                    )
-            except ValueError:
-                return (
-                    False,
-                    f"Invalid MIDI channel: {command[ch_start_pos:ch_end_pos]}",
-                )
+        Args:
+            command: Command in the form dev "Port Name" ch <channel> cc 0 <cc_0> pc <pgm>
 
-            # Extract cc_0 value
-            cc_pos = command.find("cc 0 ", ch_end_pos)
-            if cc_pos < 0:
-                return False, "Invalid command format: missing 'cc 0' parameter"
+        Returns:
+            Tuple of ((port_name, channel, cc_0_value, pgm_value) or None, error message)
+        """
+        match = _COMMAND_RE.search(command)
+        if match is None:
+            return None, _format_error(command)
 
-            cc_start_pos = cc_pos + 5  # Position after 'cc 0 '
-            cc_end_pos = command.find(" ", cc_start_pos)
-            if cc_end_pos < 0:
-                cc_end_pos = len(command)
+        port_name = match["port"]
+        try:
+            channel = int(match["ch"])
+        except ValueError:
+            return None, f"Invalid MIDI channel: {match['ch']}"
+        try:
+            cc_0_value = int(match["cc"])
+        except ValueError:
+            return None, f"Invalid CC value: {match['cc']}"
+        try:
+            pgm_value = int(match["pc"])
+        except ValueError:
+            return None, f"Invalid program change value: {match['pc']}"
 
-            try:
-                cc_0_value = int(command[cc_start_pos:cc_end_pos])
-                if cc_0_value < 0 or cc_0_value > 127:
-                    return (
-                        False,
-                        f"Invalid CC value: {cc_0_value}. Must be between 0 and 127.",
-                    )
-            except ValueError:
-                return False, f"Invalid CC value: {command[cc_start_pos:cc_end_pos]}"
+        error = _validation_error(channel, cc_0_value, pgm_value)
+        if error is not None:
+            return None, error
+
+        return (port_name, channel, cc_0_value, pgm_value), ""
 
-            # Extract pgm value
-            pc_pos = command.find("pc ", cc_end_pos)
-            if pc_pos < 0:
-                return False, "Invalid command format: missing 'pc' parameter"
+    @staticmethod
+    def send_preset_change(
+        port_name: str,
+        channel: int,
+        cc_0_value: int,
+        pgm_value: int,
+        sequencer_port: Optional[str] = None,
+    ) -> Tuple[bool, str]:
+        """
+        Send Bank Select (CC 0) and Program Change, optionally to a sequencer port too
 
-            pc_start_pos = pc_pos + 3  # Position after 'pc '
-            pc_end_pos = command.find(" ", pc_start_pos)
-            if pc_end_pos < 0:
-                pc_end_pos = len(command)
+        This is the structured form of send_midi_command for callers that
+        already hold the values; send_midi_command parses its legacy string
+        and delegates here.
 
+        Args:
+            port_name: MIDI output port name
+            channel: MIDI channel (1-16)
+            cc_0_value: Value for CC 0 (Bank Select)
+            pgm_value: Value for Program Change
+            sequencer_port: Optional sequencer port to send the command to
+
+        Returns:
+            Tuple of (success, message)
+        """
+        # Send MIDI messages using rtmidi
+        success, message = MidiUtils._send_rtmidi_message(
+            port_name, channel, cc_0_value, pgm_value
+        )
+        if not success:
+            return False, message
+
+        # The same port would only receive the messages twice
+        if sequencer_port == port_name:
+            sequencer_port = None
+
+        # If sequencer port is specified, send to that port as well
+        if sequencer_port:
+            logger.info("Sending to sequencer port: %s", sequencer_port)
             try:
-                pgm_value = int(command[pc_start_pos:pc_end_pos])
-                if pgm_value < 0 or pgm_value > 127:
-                    return (
-                        False,
-                        f"Invalid program change value: {pgm_value}. Must be between 0 and 127.",
-                    )
-            except ValueError:
-                return (
-                    False,
-                    f"Invalid program change value: {command[pc_start_pos:pc_end_pos]}",
+                seq_success, seq_message = MidiUtils._send_rtmidi_message(
+                    sequencer_port, channel, cc_0_value, pgm_value
                 )
+                if not seq_success:
+                    logger.error(f"Error sending to sequencer port: {seq_message}")
+                    return False, f"Error sending to sequencer port: {seq_message}"
+                else:
+                    logger.info(
+                        "Successfully sent to sequencer port: %s", sequencer_port
+                    )
+            except Exception as e:
+                logger.error(f"Error sending to sequencer port: {str(e)}")
+                # Continue execution even if sequencer command fails
+                # Just log the error but don't fail the whole operation
 
-            # Send MIDI messages using rtmidi
-            success, message = MidiUtils._send_rtmidi_message(
-                port_name, channel, cc_0_value, pgm_value
+        logger.info("MIDI command executed successfully")
+        return True, "Command executed successfully"
+
+    @staticmethod
+    def _find_out_port(port_name: str) -> Optional[int]:
+        """
+        Resolve port_name to an output port index using the cached port listing
+
+        An exact name is a dictionary hit; otherwise the first port whose name
+        contains port_name is used.
+        """
+        ports, out_index = MidiUtils._get_ports_snapshot()
+        if ports is None:
+            return None
+
+        port_index = out_index.get(port_name)
+        if port_index is None:
+            logger.debug(
+                "Looking for port '%s' in available ports: %s", port_name, ports["out"]
             )
-            if not success:
-                return False, message
+            port_index = next(
+                (i for i, port in enumerate(ports["out"]) if port_name in port),
+                None,
+            )
+        return port_index
 
-            # If sequencer port is specified, send to that port as well
-            if sequencer_port:
-                logger.info(f"Sending to sequencer port: {sequencer_port}")
-                try:
-                    seq_success, seq_message = MidiUtils._send_rtmidi_message(
-                        sequencer_port, channel, cc_0_value, pgm_value
+    @staticmethod
+    def _get_open_out(port_name: str) -> Optional["rtmidi.MidiOut"]:
+        """
+        Return an open MidiOut for port_name, opening and caching it on first use
+
+        Must be called with _cache_lock held. A port missing from the cached
+        listing, or a failed open, is retried once against a fresh listing,
+        which covers ports that were added or renumbered by a hotplug.
+
+        Args:
+            port_name: MIDI output port name (substring match)
+
+        Returns:
+            The open MidiOut, or None if no matching port exists
+        """
+        midi_out = MidiUtils._out_cache.get(port_name)
+        if midi_out is not None:
+            return midi_out
+
+        for attempt in range(2):
+            if attempt:
+                MidiUtils.invalidate_ports_cache()
+
+            port_index = MidiUtils._find_out_port(port_name)
+            if port_index is None:
+                if attempt:
+                    logger.warning(
+                        f"MIDI output port '{port_name}' not found in available ports"
                     )
-                    if not seq_success:
-                        logger.error(f"Error sending to sequencer port: {seq_message}")
-                        return False, f"Error sending to sequencer port: {seq_message}"
-                    else:
-                        logger.info(
-                            f"Successfully sent to sequencer port: {sequencer_port}"
-                        )
+                    return None
+                continue
+
+            midi_out = rtmidi.MidiOut()
+            try:
+                midi_out.open_port(port_index)
+            except Exception as e:
+                midi_out.delete()
+                if attempt:
+                    raise
+                logger.warning(f"Opening MIDI port '{port_name}' failed, retrying: {e}")
+                continue
+
+            logger.debug("Opened port '%s' at index %d", port_name, port_index)
+            MidiUtils._out_cache[port_name] = midi_out
+            return midi_out
+
+    @staticmethod
+    def _send_rtmidi_burst(
+        port_name: str, messages: List[bytearray]
+    ) -> Tuple[bool, str]:
+        """
+        Send several MIDI messages back-to-back on one output port
+
+        The port is looked up and every message is sent under a single
+        acquisition of _cache_lock, so a burst is never interleaved with
+        another sender. If sending fails (e.g. the device was unplugged) the
+        port is closed, reopened and the burst retried once; a second
+        failure propagates to the caller.
+
+        Args:
+            port_name: MIDI output port name
+            messages: Raw MIDI messages, sent in order
+
+        Returns:
+            Tuple of (success, message)
+        """
+        if not _HAS_MIDI_CLASSES:
+            logger.error("rtmidi module does not have MidiOut attribute")
+            return False, "rtmidi module does not have MidiOut attribute"
+
+        with MidiUtils._cache_lock:
+            for attempt in range(2):
+                midi_out = MidiUtils._get_open_out(port_name)
+
+                if midi_out is None:
+                    return False, f"MIDI output port '{port_name}' not found"
+
+                try:
+                    send_message = midi_out.send_message
+                    for message in messages:
+                        send_message(message)
+                    break
                 except Exception as e:
-                    logger.error(f"Error sending to sequencer port: {str(e)}")
-                    # Continue execution even if sequencer command fails
-                    # Just log the error but don't fail the whole operation
+                    MidiUtils._close_out(port_name)
+                    if attempt:
+                        raise
+                    logger.warning(
+                        f"Sending to MIDI port '{port_name}' failed, reopening: {e}"
+                    )
 
-            logger.info("MIDI command executed successfully")
-            return True, "Command executed successfully"
+        return True, "MIDI messages sent successfully"
 
+    @staticmethod
+    def _close_out(port_name: str) -> None:
+        """Close and forget the cached output port; must hold _cache_lock"""
+        midi_out = MidiUtils._out_cache.pop(port_name, None)
+        if midi_out is None:
+            return
+        try:
+            midi_out.close_port()
+            midi_out.delete()
         except Exception as e:
-            logger.error(f"Unexpected error executing MIDI command: {str(e)}")
-            return False, f"Unexpected error: {str(e)}"
+            logger.debug("Error closing MIDI port '%s': %s", port_name, e)
+
+    @staticmethod
+    def _close_all_outs() -> None:
+        """Close every cached output port, e.g. at interpreter exit"""
+        with MidiUtils._cache_lock:
+            for port_name in list(MidiUtils._out_cache):
+                MidiUtils._close_out(port_name)
 
     @staticmethod
     def _send_rtmidi_message(
@@ -216,50 +512,27 @@ class MidiUtils:
             return False, "rtmidi module is not available"
 
         try:
-            # Try to create MIDI output object using python-rtmidi API
-            try:
-                midi_out = rtmidi.MidiOut()
-            except AttributeError:
-                logger.error("rtmidi module does not have MidiOut attribute")
-                return False, "rtmidi module does not have MidiOut attribute"
-
-            # Get available output ports using python-rtmidi API
-            available_ports = [midi_out.get_port_name(i) for i in range(midi_out.get_port_count())]
-
-            # Find the port index
-            port_index = None
-            logger.debug(
-                f"Looking for port '{port_name}' in available ports: {available_ports}"
+            # Out-of-range values would index another channel's status byte
+            error = _validation_error(channel, cc_0_value, pgm_value)
+            if error is not None:
+                logger.error(error)
+                return False, error
+
+            # Bank Select (CC 0) then Program Change, as raw MIDI bytes. rtmidi
+            # copies each message on send, so the thread's buffers can be reused
+            cc_message, pc_message = _message_buffers()
+            cc_message[0] = _CC_STATUS[channel - 1]
+            cc_message[1] = 0
+            cc_message[2] = cc_0_value
+            pc_message[0] = _PC_STATUS[channel - 1]
+            pc_message[1] = pgm_value
+            success, message = MidiUtils._send_rtmidi_burst(
+                port_name, [cc_message, pc_message]
             )
-            for i, port in enumerate(available_ports):
-                if port_name in port:
-                    port_index = i
-                    logger.debug(f"Found port '{port_name}' at index {i}")
-                    break
-
-            if port_index is None:
-                logger.warning(
-                    f"MIDI output port '{port_name}' not found in available ports"
-                )
-                return False, f"MIDI output port '{port_name}' not found"
-
-            # Open the port
-            midi_out.open_port(port_index)
-
-            # Send Bank Select (CC 0) message using raw MIDI bytes
-            # MIDI CC message: [0xB0 + channel-1, controller, value]
-            cc_message = [0xB0 + (channel - 1), 0, cc_0_value]
-            midi_out.send_message(cc_message)
-            logger.debug(f"Sent CC message: {cc_message}")
-
-            # Send Program Change message using raw MIDI bytes
-            # MIDI PC message: [0xC0 + channel-1, program]
-            pc_message = [0xC0 + (channel - 1), pgm_value]
-            midi_out.send_message(pc_message)
-            logger.debug(f"Sent PC message: {pc_message}")
-
-            # Close the port
-            midi_out.close_port()
+            if not success:
+                return False, message
+            logger.debug("Sent CC message: %s", cc_message)
+            logger.debug("Sent PC message: %s", pc_message)
 
             return True, "MIDI messages sent successfully"
 
@@ -289,7 +562,12 @@ class MidiUtils:
             Tuple of (success, message)
         """
         logger.info(
-            f"Sending preset select: port={port_name}, channel={channel}, cc{cc_number}={cc_value}, pgm={pgm_value}"
+            "Sending preset select: port=%s, channel=%s, cc%s=%s, pgm=%s",
+            port_name,
+            channel,
+            cc_number,
+            cc_value,
+            pgm_value,
         )
 
         # Check if rtmidi is available
@@ -298,50 +576,27 @@ class MidiUtils:
             return False, "rtmidi module is not available"
 
         try:
-            # Try to create MIDI output object using python-rtmidi API
-            try:
-                midi_out = rtmidi.MidiOut()
-            except AttributeError:
-                logger.error("rtmidi module does not have MidiOut attribute")
-                return False, "rtmidi module does not have MidiOut attribute"
-
-            # Get available output ports using python-rtmidi API
-            available_ports = [midi_out.get_port_name(i) for i in range(midi_out.get_port_count())]
-
-            # Find the port index
-            port_index = None
-            logger.debug(
-                f"Looking for port '{port_name}' in available ports: {available_ports}"
+            # Out-of-range values would index another channel's status byte
+            error = _validation_error(channel, cc_value, pgm_value, cc_number)
+            if error is not None:
+                logger.error(error)
+                return False, error
+
+            # CC then Program Change, as raw MIDI bytes. rtmidi copies each
+            # message on send, so the thread's buffers can be reused
+            cc_message, pc_message = _message_buffers()
+            cc_message[0] = _CC_STATUS[channel - 1]
+            cc_message[1] = cc_number
+            cc_message[2] = cc_value
+            pc_message[0] = _PC_STATUS[channel - 1]
+            pc_message[1] = pgm_value
+            success, message = MidiUtils._send_rtmidi_burst(
+                port_name, [cc_message, pc_message]
             )
-            for i, port in enumerate(available_ports):
-                if port_name in port:
-                    port_index = i
-                    logger.debug(f"Found port '{port_name}' at index {i}")
-                    break
-
-            if port_index is None:
-                logger.warning(
-                    f"MIDI output port '{port_name}' not found in available ports"
-                )
-                return False, f"MIDI output port '{port_name}' not found"
-
-            # Open the port
-            midi_out.open_port(port_index)
-
-            # Send CC message using raw MIDI bytes
-            # MIDI CC message: [0xB0 + channel-1, controller, value]
-            cc_message = [0xB0 + (channel - 1), cc_number, cc_value]
-            midi_out.send_message(cc_message)
-            logger.debug(f"Sent CC message: {cc_message}")
-
-            # Send Program Change message using raw MIDI bytes
-            # MIDI PC message: [0xC0 + channel-1, program]
-            pc_message = [0xC0 + (channel - 1), pgm_value]
-            midi_out.send_message(pc_message)
-            logger.debug(f"Sent PC message: {pc_message}")
-
-            # Close the port
-            midi_out.close_port()
+            if not success:
+                return False, message
+            logger.debug("Sent CC message: %s", cc_message)
+            logger.debug("Sent PC message: %s", pc_message)
 
             return True, "Preset selection sent successfully"
 
@@ -360,17 +615,20 @@ class MidiUtils:
             return False
 
         try:
-            # Try to create MIDI input and output objects using python-rtmidi API
-            try:
-                midi_in = rtmidi.MidiIn()
-                midi_out = rtmidi.MidiOut()
-            except AttributeError:
+            if not _HAS_MIDI_CLASSES:
                 logger.error("rtmidi module does not have MidiIn or MidiOut attributes")
                 return False
 
-            # Get available ports using python-rtmidi API
-            in_ports = [midi_in.get_port_name(i) for i in range(midi_in.get_port_count())]
-            out_ports = [midi_out.get_port_name(i) for i in range(midi_out.get_port_count())]
+            # Reuse the shared MIDI input and output objects for enumeration;
+            # the lock keeps invalidate_ports_cache from deleting them meanwhile
+            with MidiUtils._ports_cache_lock:
+                midi_in, midi_out = MidiUtils._get_probes()
+
+                # Get available ports using python-rtmidi API
+                in_ports = [midi_in.get_port_name(i) for i in range(midi_in.get_port_count())]
+                out_ports = [
+                    midi_out.get_port_name(i) for i in range(midi_out.get_port_count())
+                ]
 
             # Check if any ports are available
             has_ports = len(in_ports) > 0 or len(out_ports) > 0
@@ -378,7 +636,7 @@ class MidiUtils:
             if has_ports:
                 logger.info("MIDI functionality is available")
                 logger.debug(
-                    f"Found {len(in_ports)} input ports and {len(out_ports)} output ports"
+                    "Found %d input ports and %d output ports", len(in_ports), len(out_ports)
                 )
             else:
                 logger.warning("No MIDI ports found on the system")
@@ -416,14 +674,22 @@ class MidiUtils:
         Returns:
             Tuple of (success, message)
         """
-        logger.info(f"Executing MIDI command asynchronously: {command}")
+        logger.info("Executing MIDI command asynchronously: %s", command)
         try:
-            # Get the current event loop
-            loop = asyncio.get_event_loop()
+            # Parse on the event loop so the MIDI thread only does the sends
+            parsed, error = MidiUtils._parse_command(command)
+            if parsed is None:
+                return False, error
+
+            # Get the running event loop
+            loop = asyncio.get_running_loop()
 
-            # Run the synchronous send_midi_command in a thread pool
+            # Run the sends on the dedicated MIDI thread
             result = await loop.run_in_executor(
-                None, lambda: MidiUtils.send_midi_command(command, sequencer_port)
+                _midi_executor,
+                functools.partial(
+                    MidiUtils.send_preset_change, *parsed, sequencer_port
+                ),
             )
 
             return result
@@ -457,30 +723,49 @@ class MidiUtils:
             Tuple of (success, message)
         """
         logger.info(
-            f"Sending preset select asynchronously: port={port_name}, channel={channel}, cc{cc_number}={cc_value}, pgm={pgm_value}"
+            "Sending preset select asynchronously: port=%s, channel=%s, cc%s=%s, pgm=%s",
+            port_name,
+            channel,
+            cc_number,
+            cc_value,
+            pgm_value,
         )
         try:
-            # Get the current event loop
-            loop = asyncio.get_event_loop()
+            # Get the running event loop
+            loop = asyncio.get_running_loop()
 
-            # Run the synchronous send_preset_select in a thread pool
+            # Run the synchronous send_preset_select on the dedicated MIDI thread
             result = await loop.run_in_executor(
-                None,
-                lambda: MidiUtils.send_preset_select(
-                    port_name, channel, pgm_value, cc_value, cc_number
+                _midi_executor,
+                functools.partial(
+                    MidiUtils.send_preset_select,
+                    port_name,
+                    channel,
+                    pgm_value,
+                    cc_value,
+                    cc_number,
                 ),
             )
 
+            # The same port would only receive the messages twice
+            if sequencer_port == port_name:
+                sequencer_port = None
+
             # If sequencer port is specified, send to that port as well
             if (
                 sequencer_port and result[0]
             ):  # Only send to sequencer if first send was successful
-                logger.info(f"Sending to sequencer port: {sequencer_port}")
+                logger.info("Sending to sequencer port: %s", sequencer_port)
                 try:
                     seq_result = await loop.run_in_executor(
-                        None,
-                        lambda: MidiUtils.send_preset_select(
-                            sequencer_port, channel, pgm_value, cc_value, cc_number
+                        _midi_executor,
+                        functools.partial(
+                            MidiUtils.send_preset_select,
+                            sequencer_port,
+                            channel,
+                            pgm_value,
+                            cc_value,
+                            cc_number,
                         ),
                     )
 
@@ -494,7 +779,7 @@ class MidiUtils:
                         )
                     else:
                         logger.info(
-                            f"Successfully sent to sequencer port: {sequencer_port}"
+                            "Successfully sent to sequencer port: %s", sequencer_port
                         )
                 except Exception as e:
                     logger.error(f"Error sending to sequencer port: {str(e)}")
@@ -505,3 +790,6 @@ class MidiUtils:
         except Exception as e:
             logger.error(f"Unexpected error in asend_preset_select: {str(e)}")
             return False, f"Unexpected error in asend_preset_select: {str(e)}"
+
+
+atexit.register(MidiUtils._close_all_outs)
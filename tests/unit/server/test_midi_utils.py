@@ -54,6 +54,74 @@ class TestMidiUtils(unittest.TestCase):
         self.assertEqual(result["in"], [])
         self.assertEqual(result["out"], [])
 
+    @patch("server.midi_utils.time.monotonic")
+    @patch("server.midi_utils.MidiUtils._enumerate_ports")
+    @patch("server.midi_utils.rtmidi")
+    def test_get_midi_ports_cache(self, mock_rtmidi, mock_enumerate, mock_monotonic):
+        """Test that port listings are cached for _PORTS_TTL seconds"""
+        self.addCleanup(MidiUtils.invalidate_ports_cache)
+        MidiUtils.invalidate_ports_cache()
+        mock_enumerate.return_value = {"in": ["In 1"], "out": ["Out 1"]}
+
+        # The first call enumerates, a call within the TTL is served from cache
+        mock_monotonic.return_value = 100.0
+        MidiUtils.get_midi_ports()
+        mock_monotonic.return_value = 100.4
+        result = MidiUtils.get_midi_ports()
+        self.assertEqual(result, {"in": ["In 1"], "out": ["Out 1"]})
+        self.assertEqual(mock_enumerate.call_count, 1)
+
+        # Once the TTL has passed the ports are enumerated again
+        mock_monotonic.return_value = 100.6
+        MidiUtils.get_midi_ports()
+        self.assertEqual(mock_enumerate.call_count, 2)
+
+        # Invalidation forces an enumeration even within the TTL
+        MidiUtils.invalidate_ports_cache()
+        MidiUtils.get_midi_ports()
+        self.assertEqual(mock_enumerate.call_count, 3)
+
+    @patch.object(MidiUtils, "_probe_out", None)
+    @patch.object(MidiUtils, "_probe_in", None)
+    @patch("server.midi_utils.rtmidi")
+    def test_probes_rebuilt_after_invalidation(self, mock_rtmidi):
+        """Test that the enumeration pair is created once and rebuilt on invalidation"""
+        mock_rtmidi.MidiIn.side_effect = [MagicMock(), MagicMock()]
+        mock_rtmidi.MidiOut.side_effect = [MagicMock(), MagicMock()]
+
+        # Repeated lookups share one pair
+        first_pair = MidiUtils._get_probes()
+        self.assertEqual(MidiUtils._get_probes(), first_pair)
+        self.assertEqual(mock_rtmidi.MidiIn.call_count, 1)
+        self.assertEqual(mock_rtmidi.MidiOut.call_count, 1)
+
+        # Invalidating the port cache deletes the pair
+        MidiUtils.invalidate_ports_cache()
+        for probe in first_pair:
+            probe.delete.assert_called_once_with()
+
+        # The next lookup creates a new pair
+        second_pair = MidiUtils._get_probes()
+        self.assertNotEqual(second_pair, first_pair)
+        self.assertEqual(mock_rtmidi.MidiIn.call_count, 2)
+        self.assertEqual(mock_rtmidi.MidiOut.call_count, 2)
+
+    @patch("server.midi_utils.MidiUtils._enumerate_ports")
+    @patch("server.midi_utils.rtmidi")
+    def test_get_midi_ports_returns_copy(self, mock_rtmidi, mock_enumerate):
+        """Test that modifying a returned port listing does not change the cache"""
+        self.addCleanup(MidiUtils.invalidate_ports_cache)
+        MidiUtils.invalidate_ports_cache()
+        mock_enumerate.return_value = {"in": ["In 1"], "out": ["Out 1"]}
+
+        # Modify the first result
+        result = MidiUtils.get_midi_ports()
+        result["out"].append("Out 2")
+
+        # The next call, served from cache, is unaffected
+        self.assertEqual(MidiUtils.get_midi_ports()["out"], ["Out 1"])
+        self.assertEqual(mock_enumerate.call_count, 1)
+
     @patch("server.midi_utils.MidiUtils._send_rtmidi_message")
     def test_send_midi_command(self, mock_send_rtmidi):
         """Test sending a MIDI command"""
@@ -96,6 +164,33 @@ class TestMidiUtils(unittest.TestCase):
             [call("Port 1", 1, 0, 0), call("Sequencer Port", 1, 0, 0)]
         )
 
+    @patch("server.midi_utils.MidiUtils._send_rtmidi_message")
+    def test_send_midi_command_same_sequencer_port(self, mock_send_rtmidi):
+        """Test that a sequencer port equal to the target port is not sent twice"""
+        mock_send_rtmidi.return_value = (True, "MIDI messages sent successfully")
+
+        success, message = MidiUtils.send_midi_command(
+            'sendmidi dev "Port 1" ch 1 cc 0 0 pc 0', sequencer_port="Port 1"
+        )
+
+        self.assertTrue(success)
+        mock_send_rtmidi.assert_called_once_with("Port 1", 1, 0, 0)
+
+    @patch("server.midi_utils.MidiUtils._send_rtmidi_message")
+    def test_send_preset_change(self, mock_send_rtmidi):
+        """Test sending structured preset values without a command string"""
+        mock_send_rtmidi.return_value = (True, "MIDI messages sent successfully")
+
+        success, message = MidiUtils.send_preset_change(
+            "Port 1", 2, 1, 5, sequencer_port="Sequencer Port"
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(message, "Command executed successfully")
+        mock_send_rtmidi.assert_has_calls(
+            [call("Port 1", 2, 1, 5), call("Sequencer Port", 2, 1, 5)]
+        )
+
     @patch("server.midi_utils.MidiUtils._send_rtmidi_message")
     def test_send_midi_command_error(self, mock_send_rtmidi):
         """Test sending a MIDI command with an error"""
@@ -120,6 +215,95 @@ class TestMidiUtils(unittest.TestCase):
         self.assertFalse(success)
         self.assertTrue("Invalid command format" in message)
 
+    @patch.dict(MidiUtils._out_cache, clear=True)
+    @patch("server.midi_utils.MidiUtils._find_out_port", return_value=0)
+    @patch("server.midi_utils._HAS_MIDI_CLASSES", True)
+    @patch("server.midi_utils.rtmidi")
+    def test_send_reuses_open_port(self, mock_rtmidi, mock_find_out_port):
+        """Test that repeated sends to one port reuse the open MidiOut"""
+        midi_out = mock_rtmidi.MidiOut.return_value
+
+        # Send twice to the same port
+        for _ in range(2):
+            success, _ = MidiUtils._send_rtmidi_message("Port 1", 1, 0, 0)
+            self.assertTrue(success)
+
+        # The port was opened once and both bursts went through it
+        mock_rtmidi.MidiOut.assert_called_once_with()
+        midi_out.open_port.assert_called_once_with(0)
+        self.assertEqual(midi_out.send_message.call_count, 4)
+        self.assertIs(MidiUtils._out_cache["Port 1"], midi_out)
+
+    @patch.dict(MidiUtils._out_cache, clear=True)
+    @patch("server.midi_utils.MidiUtils._find_out_port", return_value=0)
+    @patch("server.midi_utils._HAS_MIDI_CLASSES", True)
+    @patch("server.midi_utils.rtmidi")
+    def test_send_reopens_port_after_error(self, mock_rtmidi, mock_find_out_port):
+        """Test that a failed send closes the port, reopens it and retries"""
+        stale_out = MagicMock()
+        stale_out.send_message.side_effect = OSError("device unplugged")
+        fresh_out = MagicMock()
+        mock_rtmidi.MidiOut.side_effect = [stale_out, fresh_out]
+
+        # Call the method under test
+        success, message = MidiUtils._send_rtmidi_message("Port 1", 1, 0, 0)
+
+        # Verify the results
+        self.assertTrue(success)
+        self.assertEqual(message, "MIDI messages sent successfully")
+
+        # The stale port was closed and replaced in the cache
+        stale_out.close_port.assert_called_once_with()
+        stale_out.delete.assert_called_once_with()
+        fresh_out.open_port.assert_called_once_with(0)
+        self.assertEqual(fresh_out.send_message.call_count, 2)
+        self.assertEqual(MidiUtils._out_cache, {"Port 1": fresh_out})
+
+    @patch.dict(MidiUtils._out_cache, clear=True)
+    def test_close_all_outs(self):
+        """Test that closing all outputs closes and forgets every cached port"""
+        ports = {"Port 1": MagicMock(), "Port 2": MagicMock()}
+        MidiUtils._out_cache.update(ports)
+
+        # Call the method under test
+        MidiUtils._close_all_outs()
+
+        # Verify every port was closed and the cache is empty
+        for midi_out in ports.values():
+            midi_out.close_port.assert_called_once_with()
+            midi_out.delete.assert_called_once_with()
+        self.assertEqual(MidiUtils._out_cache, {})
+
+    @patch("server.midi_utils.MidiUtils._send_rtmidi_burst")
+    @patch("server.midi_utils.rtmidi")
+    def test_send_rejects_out_of_range_values(self, mock_rtmidi, mock_send_burst):
+        """Test that out-of-range values are rejected before anything is sent"""
+        send_rtmidi = MidiUtils._send_rtmidi_message
+        select = MidiUtils.send_preset_select
+
+        # Each sender, its arguments and the start of the expected error
+        cases = [
+            (send_rtmidi, ("Port 1", 0, 0, 0), "Invalid MIDI channel: 0."),
+            (send_rtmidi, ("Port 1", -1, 0, 0), "Invalid MIDI channel: -1."),
+            (send_rtmidi, ("Port 1", 17, 0, 0), "Invalid MIDI channel: 17."),
+            (send_rtmidi, ("Port 1", 1, 128, 0), "Invalid CC value: 128."),
+            (send_rtmidi, ("Port 1", 1, 0, -1), "Invalid program change value: -1."),
+            (select, ("Port 1", 0, 0), "Invalid MIDI channel: 0."),
+            (select, ("Port 1", -1, 0), "Invalid MIDI channel: -1."),
+            (select, ("Port 1", 17, 0), "Invalid MIDI channel: 17."),
+            (select, ("Port 1", 1, 0, 0, 128), "Invalid CC number: 128."),
+            (select, ("Port 1", 1, 128), "Invalid program change value: 128."),
+        ]
+
+        for send, args, expected in cases:
+            with self.subTest(send=send.__name__, args=args):
+                success, error = send(*args)
+
+                self.assertFalse(success)
+                self.assertTrue(error.startswith(expected), error)
+
+        mock_send_burst.assert_not_called()
+
     @patch("server.midi_utils.MidiUtils.is_midi_available")
     def test_is_sendmidi_installed(self, mock_is_midi_available):
         """Test checking if SendMIDI is installed (now redirects to is_midi_available)"""
@@ -156,31 +340,50 @@ class TestMidiUtils(unittest.TestCase):
         # Verify the result is a boolean
         self.assertIsInstance(result, bool)
 
-    @patch("server.midi_utils.MidiUtils.send_midi_command")
-    @patch("asyncio.get_event_loop")
-    def test_asend_midi_command(self, mock_get_loop, mock_send_midi_command):
+    @patch("server.midi_utils.MidiUtils.send_preset_change")
+    def test_asend_midi_command(self, mock_send_preset_change):
         """Test sending a MIDI command asynchronously"""
-        # Set up mock return values
-        mock_loop = MagicMock()
-        mock_get_loop.return_value = mock_loop
-        mock_loop.run_in_executor.return_value = asyncio.Future()
-        mock_loop.run_in_executor.return_value.set_result(
-            (True, "Command executed successfully")
-        )
+        # Set up mock return value
+        mock_send_preset_change.return_value = (True, "Command executed successfully")
 
-        # Call the method under test
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(
+        # Call the method under test on a running event loop
+        result = asyncio.run(
             MidiUtils.asend_midi_command("sendmidi dev 'Port 1' ch 1 cc 0 0 pc 0")
         )
-        loop.close()
 
         # Verify the results
         self.assertEqual(result, (True, "Command executed successfully"))
 
-        # Verify that run_in_executor was called
-        mock_loop.run_in_executor.assert_called_once()
+        # Verify that the parsed command was sent from the executor
+        mock_send_preset_change.assert_called_once_with("Port 1", 1, 0, 0, None)
+
+    @patch("server.midi_utils.MidiUtils.send_preset_change")
+    def test_asend_midi_command_invalid_format(self, mock_send_preset_change):
+        """Test that an invalid command is rejected before reaching the executor"""
+        # Each command and the start of the error naming the offending field
+        cases = [
+            ("invalid command", "Invalid command format: missing 'dev' parameter"),
+            ("dev 'Port 1 ch 1", "Invalid command format: missing closing quote"),
+            ("dev 'Port 1' cc 0 0 pc 0", "Invalid command format: missing 'ch'"),
+            ("dev 'Port 1' ch 1 pc 0", "Invalid command format: missing 'cc 0'"),
+            ("dev 'Port 1' ch 1 cc 0 0", "Invalid command format: missing 'pc'"),
+            ("dev 'Port 1' ch -1 cc 0 0 pc 0", "Invalid MIDI channel: -1."),
+            ("dev 'Port 1' ch 17 cc 0 0 pc 0", "Invalid MIDI channel: 17."),
+            ("dev 'Port 1' ch x cc 0 0 pc 0", "Invalid MIDI channel: x"),
+            ("dev 'Port 1' ch 1 cc 0 -1 pc 0", "Invalid CC value: -1."),
+            ("dev 'Port 1' ch 1 cc 0 128 pc 0", "Invalid CC value: 128."),
+            ("dev 'Port 1' ch 1 cc 0 0 pc -1", "Invalid program change value: -1."),
+            ("dev 'Port 1' ch 1 cc 0 0 pc 128", "Invalid program change value: 128."),
+        ]
+
+        for command, expected in cases:
+            with self.subTest(command=command):
+                success, message = asyncio.run(MidiUtils.asend_midi_command(command))
+
+                self.assertFalse(success)
+                self.assertTrue(message.startswith(expected), message)
+
+        mock_send_preset_change.assert_not_called()
 
 
 if __name__ == "__main__":